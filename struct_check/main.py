@@ -3,76 +3,432 @@
 from __future__ import annotations
 
 import ast
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import math
+import os
+import re
 import sys
+import tempfile
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterator, NoReturn
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
-FLOWS_DIR = PROJECT_ROOT / 'app' / 'outsource' / 'flows'
+APP_DIR = PROJECT_ROOT / 'app'
+FLOWS_DIR = APP_DIR / 'outsource' / 'flows'
+CACHE_DIR = PROJECT_ROOT / '.precheck_cache'
+CACHE_FILE = CACHE_DIR / 'results.json'
 
+# Обязательная структура проекта: (описание, путь, это файл)
+REQUIRED_STRUCTURE = (
+    ('app', PROJECT_ROOT / 'app', False),
+    ('app/outsource', PROJECT_ROOT / 'app' / 'outsource', False),
+    ('app/outsource/flows', PROJECT_ROOT / 'app' / 'outsource' / 'flows', False),
+    ('app/consts.py', PROJECT_ROOT / 'app' / 'consts.py', True),
+    ('demonstration', PROJECT_ROOT / 'demonstration', False),
+    ('demonstration/main.py', PROJECT_ROOT / 'demonstration' / 'main.py', True),
+    ('eksmo_src', PROJECT_ROOT / 'eksmo_src', False),
+    ('.pre-commit-config.yaml', PROJECT_ROOT / '.pre-commit-config.yaml', True),
+    ('pyproject.toml', PROJECT_ROOT / 'pyproject.toml', True),
+    ('README.md', PROJECT_ROOT / 'README.md', True),
+)
+
+# Директории, в которые не спускаемся при обходе проекта (кроме app/:
+# там проверяются импорты всех файлов без исключения)
+EXCLUDED_DIRS = frozenset({'venv', 'env', '.venv', '__pycache__', '.git'})
+
+# С какого числа файлов проверять их в пуле процессов. Запуск пула стоит
+# ~5-11 мс, а отправка файла воркеру — почти столько же, сколько его
+# проверка (~0.04-0.07 мс на типичный flow-файл), поэтому пул окупается
+# только на сотнях файлов: на 40 файлах он в ~5 раз медленнее
+PROCESS_POOL_MIN_FILES = 512
+
+# Файлов на одну задачу пула процессов
+PROCESS_POOL_CHUNKSIZE = 8
+
+# С какого числа непрочитанных файлов читать их в пуле потоков. При тёплом
+# page cache пул всегда медленнее последовательного чтения (46 файлов:
+# 1.6 мс против 0.4; 1024: 25 мс против 12), выигрыш есть только на холодном
+# или сетевом диске. Порог выбран так, чтобы потеря в худшем случае была
+# порядка 10 мс, а выигрыш на холодном диске — в разы больше
+PRELOAD_MIN_FILES = 1024
 
-def fail(message: str) -> None:
-    """Вывод ошибки и завершение."""
-    print(f'❌ {message}')
-    sys.exit(1)
+# Потоков для параллельного чтения файлов: чтение ждёт I/O и отпускает GIL
+READ_WORKERS = 16
+
+# Ключевые слова секций README.md (в нижнем регистре)
+README_INSTALL_KEYWORDS = ('установка', 'installation', 'setup', 'инсталляция', 'install')
+README_RUN_KEYWORDS = ('запуск', 'run', 'usage', 'использование', 'демонстрация')
+
+# Один проход по тексту вместо отдельного поиска каждого ключевого слова
+_README_INSTALL_RE = re.compile('|'.join(map(re.escape, README_INSTALL_KEYWORDS)))
+_README_RUN_RE = re.compile('|'.join(map(re.escape, README_RUN_KEYWORDS)))
+
+# Объявление кодировки исходника (PEP 263), допустимо в первых двух строках
+_CODING_COOKIE_RE = re.compile(rb'^[ \t\f]*#.*?coding[:=]')
+
+# Результаты проверок файлов: {relpath: {"sha": hex, "ok": bool, "msgs": [str, ...]}}
+_cache: dict[str, dict] = {}
+
+# Ключи кэша, к которым обращались в этом запуске: только они и сохраняются,
+# так записи удалённых и переименованных файлов не копятся
+_cache_used: set[str] = set()
+
+# Содержимое прочитанных файлов: {путь: bytes} (см. _read_bytes())
+_sources: dict[str, bytes] = {}
+
+# Ошибки всех проверок: выводятся вместе в конце запуска
+_errors: list[str] = []
+
+
+class CheckError(Exception):
+    """Ошибка проверки; сообщения (args) выводятся пользователю."""
+
+
+def fail(*messages: str) -> NoReturn:
+    """Прерывает текущую проверку с одной или несколькими ошибками."""
+    raise CheckError(*messages)
+
+
+@contextlib.contextmanager
+def collect_errors() -> Iterator[None]:
+    """Перехватывает ошибку проверки и добавляет её в общий список _errors."""
+    try:
+        yield
+    except CheckError as error:
+        _errors.extend(error.args)
+
+
+def _checker_sha() -> str:
+    """Хэш самого валидатора: при изменении правил кэш сбрасывается."""
+    return hashlib.sha256(_read_bytes(__file__)).hexdigest()
+
+
+def load_cache() -> None:
+    """Загружает кэш результатов проверок из .precheck_cache/."""
+    _cache.clear()
+    _cache_used.clear()
+    try:
+        data = json.loads(CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return
+
+    if isinstance(data, dict) and data.get('checker') == _checker_sha():
+        _cache.update(data.get('files', {}))
+
+
+def save_cache() -> None:
+    """Атомарно сохраняет кэш результатов проверок, использованных в этом запуске."""
+    files = {key: _cache[key] for key in sorted(_cache_used) if key in _cache}
+    data = {'checker': _checker_sha(), 'files': files}
+    tmp_name = None
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        gitignore = CACHE_DIR / '.gitignore'
+        if not gitignore.exists():
+            gitignore.write_text('*\n')
+
+        fd, tmp_name = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+            json.dump(data, tmp, ensure_ascii=False)
+        os.replace(tmp_name, CACHE_FILE)
+    except OSError:
+        # Кэш — только ускорение, его отсутствие не должно ломать проверку
+        if tmp_name is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+
+
+def _cache_key(file: Path) -> str:
+    return file.relative_to(PROJECT_ROOT).as_posix()
+
+
+def file_digest(file: Path) -> str:
+    """Хэш содержимого файла для кэша."""
+    return hashlib.sha256(_read_bytes(str(file))).hexdigest()
+
+
+def cache_hit(file: Path, digest: str) -> bool:
+    """Возвращает True, если файл с таким содержимым уже проверялся.
+
+    Для закэшированной ошибки сразу вызывает fail().
+    """
+    key = _cache_key(file)
+    _cache_used.add(key)
+    entry = _cache.get(key)
+    if entry is None or entry.get('sha') != digest:
+        return False
+
+    if not entry.get('ok'):
+        fail(*(entry.get('msgs') or [f'{file}: ошибка проверки']))
+    print(f'✔ OK (кэш): {key}')
+    return True
+
+
+def cache_store(file: Path, digest: str, errors: tuple[str, ...]) -> None:
+    """Запоминает результат проверки файла (пустой errors — проверка пройдена)."""
+    key = _cache_key(file)
+    _cache_used.add(key)
+    _cache[key] = {
+        'sha': digest,
+        'ok': not errors,
+        'msgs': list(errors),
+    }
+
+
+def cached(file: Path, checker: Callable[[Path, bytes], None]) -> None:
+    """Запускает checker для файла, только если содержимое изменилось с прошлого запуска."""
+    digest = file_digest(file)
+    if cache_hit(file, digest):
+        return
+
+    try:
+        checker(file, _read_bytes(str(file)))
+    except CheckError as error:
+        cache_store(file, digest, error.args)
+        raise
+
+    cache_store(file, digest, ())
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """Результат проверки одного файла в дочернем процессе."""
+
+    errors: tuple[str, ...]
+    output: str
+
+
+def _check_file(checker: Callable[[Path, bytes], None], item: tuple[str, bytes]) -> FileResult:
+    """Запускает checker для одного файла, перехватывая вывод и ошибку.
+
+    Выполняется в дочернем процессе: fail() не должен завершать воркер,
+    поэтому ошибка возвращается родителю как значение.
+    """
+    path, source = item
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            checker(Path(path), source)
+    except CheckError as error:
+        return FileResult(error.args, output.getvalue())
+    return FileResult((), output.getvalue())
+
+
+def run_checks(checker: Callable[[Path, bytes], None], files: list[Path]) -> None:
+    """Проверяет независимые файлы, при большом их числе — в пуле процессов.
+
+    Файлы с закэшированным результатом не перепроверяются.
+    """
+    # Содержимое нужно для хэша всех файлов
+    _preload(files)
+
+    errors = []
+    pending = []
+    for file in files:
+        digest = file_digest(file)
+        try:
+            if not cache_hit(file, digest):
+                pending.append((file, digest))
+        except CheckError as error:
+            errors.extend(error.args)
+
+    items = [(str(file), _read_bytes(str(file))) for file, _ in pending]
+    worker = functools.partial(_check_file, checker)
+
+    if len(items) < PROCESS_POOL_MIN_FILES:
+        results = [worker(item) for item in items]
+    else:
+        # Не больше воркеров, чем задач: лишние процессы стартуют впустую
+        tasks = math.ceil(len(items) / PROCESS_POOL_CHUNKSIZE)
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, tasks)) as executor:
+            results = list(executor.map(worker, items, chunksize=PROCESS_POOL_CHUNKSIZE))
+
+    for (file, digest), result in zip(pending, results):
+        cache_store(file, digest, result.errors)
+        print(result.output, end='')
+        errors.extend(result.errors)
+
+    if errors:
+        fail(*errors)
+
+
+def _collect_py_files() -> list[tuple[Path, int]]:
+    """Один обход проекта: все .py файлы вместе с их размером в байтах.
+
+    Результат переиспользуется всеми проверками; содержимое читается
+    лениво через _read_bytes() и только там, где оно действительно нужно.
+    EXCLUDED_DIRS отсекаются везде, кроме app/ — его файлы нужны проверке
+    импортов целиком, а проверка длины отфильтровывает их сама.
+    Внутри app/ (и для самого app/) обход идёт и по симлинкам на директории,
+    чтобы проверка импортов видела все файлы; повторный заход в одну и ту же
+    директорию (цикл симлинков) отсекается по (st_dev, st_ino).
+    """
+    app_dir = str(APP_DIR)
+    seen = set()
+    result = []
+    stack = [(str(PROJECT_ROOT), True)]
+    while stack:
+        directory, prune = stack.pop()
+        if not prune:
+            stat = os.stat(directory)
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+            seen.add((stat.st_dev, stat.st_ino))
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                in_app = not prune or entry.path == app_dir
+                if entry.is_dir(follow_symlinks=in_app):
+                    if in_app or entry.name not in EXCLUDED_DIRS:
+                        stack.append((entry.path, not in_app))
+                elif entry.name.endswith('.py') and entry.is_file():
+                    result.append((Path(entry.path), entry.stat().st_size))
+
+    result.sort()
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def _dir_entries(directory: Path) -> dict[str, tuple[bool, bool]]:
+    """Содержимое директории: {имя: (is_dir, is_file)}.
+
+    Каждая директория читается одним os.scandir за запуск; тип записи
+    берётся из dirent, без отдельного stat на каждый элемент.
+    Для отсутствующей директории возвращается пустой словарь.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name: (entry.is_dir(), entry.is_file()) for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+
+
+def _is_dir(path: Path) -> bool:
+    return _dir_entries(path.parent).get(path.name, (False, False))[0]
+
+
+def _is_file(path: Path) -> bool:
+    return _dir_entries(path.parent).get(path.name, (False, False))[1]
+
+
+def _read_bytes(path: str) -> bytes:
+    """Читает файл; каждый файл читается с диска не больше одного раза за запуск.
+
+    Все проверки берут содержимое файлов только через эту функцию.
+    """
+    source = _sources.get(path)
+    if source is None:
+        source = _sources[path] = Path(path).read_bytes()
+    return source
+
+
+def _preload(files: list[Path]) -> None:
+    """Заранее читает ещё не прочитанные файлы в пуле потоков, заполняя кэш _read_bytes().
+
+    Чтения выполняются одновременно, и задержки open/read на много
+    мелких файлов перекрываются.
+    """
+    paths = [path for path in map(str, files) if path not in _sources]
+    if len(paths) < PRELOAD_MIN_FILES:
+        return  # прочитаются по мере надобности
+
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        _sources.update(zip(paths, pool.map(Path.read_bytes, map(Path, paths))))
+
+
+@functools.lru_cache(maxsize=None)
+def _parse(source: bytes, filename: str) -> ast.Module:
+    """Разбирает исходник в AST; одинаковое содержимое разбирается один раз.
+
+    Прямой вызов compile() без обёртки ast.parse() и без наследования
+    __future__-флагов самого валидатора.
+    """
+    return compile(source, filename, 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
 
 
 def check_structure() -> None:
     """Проверяет существование нужной структуры директорий."""
-    if not FLOWS_DIR.exists() or not FLOWS_DIR.is_dir():
+    if not _is_dir(FLOWS_DIR):
         fail(f'Не найдена директория flows: {FLOWS_DIR}')
 
-    for file in FLOWS_DIR.iterdir():
-        if not file.is_file():
+    errors = []
+    for name, (_, is_file) in sorted(_dir_entries(FLOWS_DIR).items()):
+        # Разрешены __init__.py и flow-файлы *_flow.py; имя проверяем
+        # раньше типа записи, он нужен только для неподходящих имён
+        if name == '__init__.py' or name.endswith('_flow.py'):
             continue
 
-        # Разрешённые файлы
-        if file.name in {'__init__.py'}:
-            continue
+        if is_file:
+            errors.append(f'Неверное имя файла flow: {name} (ожидается *_flow.py)')
 
-        # Все flow — только *_flow.py
-        if not file.name.endswith('_flow.py'):
-            fail(f'Неверное имя файла flow: {file.name} (ожидается *_flow.py)')
+    if errors:
+        fail(*errors)
 
     print('✔ Структура папок корректна')
 
 
-def check_flow_file(file: Path) -> None:
+def check_flow_file(file: Path, source: bytes) -> None:
     """Проверяет один файл *_flow.py."""
 
-    tree = ast.parse(file.read_text())
-    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    # Имя Flow-класса обязано содержать байты b'Flow' только в ASCII-файле
+    # без объявления кодировки: не-ASCII идентификаторы нормализуются по NFKC,
+    # а cookie (например, utf-7) меняет байты исходника. Такие файлы разбираем всегда
+    has_flow = (
+            b'Flow' in source
+            or not source.isascii()
+            or any(_CODING_COOKIE_RE.match(line) for line in source.splitlines()[:2])
+    )
+    body = _parse(source, str(file)).body if has_flow else []
 
-    flow_classes = [cls for cls in classes if cls.name.endswith('Flow')]
+    # Один проход: находим Flow-класс и сразу его метод run()
+    flow_class = None
+    run_method = None
+    for node in body:
+        if not isinstance(node, ast.ClassDef) or not node.name.endswith('Flow'):
+            continue
 
-    if not flow_classes:
-        fail(f"{file}: отсутствуют классы, имя которых заканчивается на 'Flow'")
+        if flow_class is not None:
+            fail(
+                f'{file}: в файле должно быть только один Flow-класс, '
+                f'найдено как минимум два ({flow_class.name}, {node.name})'
+            )
+        flow_class = node
 
-    if len(flow_classes) > 1:
-        fail(f'{file}: в файле должно быть только один Flow-класс, найдено {len(flow_classes)}')
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == 'run':
+                run_method = item
+                break
 
-    flow_class = flow_classes[0]
+    if flow_class is None:
+        fail(f"{file}: отсутствуют классы, имя которых заканчивается на 'Flow'")
 
-    check_run_method(flow_class, file)
+    check_run_method(flow_class, run_method, file)
 
 
 def check_flow_run_signature() -> None:
     """Проверяет содержимое всех flow-файлов."""
-    for file in FLOWS_DIR.glob('*_flow.py'):
-        check_flow_file(file)
+    flow_files = [
+        FLOWS_DIR / name
+        for name, (_, is_file) in sorted(_dir_entries(FLOWS_DIR).items())
+        if is_file and name.endswith('_flow.py')
+    ]
+    run_checks(check_flow_file, flow_files)
 
 
-def check_run_method(class_node: ast.ClassDef, file: Path) -> None:
+def check_run_method(
+        class_node: ast.ClassDef,
+        run_method: ast.FunctionDef | ast.AsyncFunctionDef | None,
+        file: Path,
+) -> None:
     """Проверка метода run() в одном Flow-классе."""
 
-    run_method = None
-
-    # Ищем async def run()
-    for item in class_node.body:
-        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == 'run':
-            run_method = item
-            break
-
     if not run_method:
         fail(f'{file}: класс {class_node.name} — отсутствует метод run()')
 
@@ -81,19 +437,26 @@ def check_run_method(class_node: ast.ClassDef, file: Path) -> None:
         fail(f'{file}: метод run() в {class_node.name} должен быть async')
 
     # Проверка что @classmethod
-    has_classmethod = any(
-        (isinstance(d, ast.Name) and d.id == 'classmethod')
-        or (isinstance(d, ast.Attribute) and d.attr == 'classmethod')
-        for d in run_method.decorator_list
-    )
+    has_classmethod = False
+    for d in run_method.decorator_list:
+        if (
+                (isinstance(d, ast.Name) and d.id == 'classmethod')
+                or (isinstance(d, ast.Attribute) and d.attr == 'classmethod')
+        ):
+            has_classmethod = True
+            break
 
     if not has_classmethod:
         fail(f'{file}: метод run() в {class_node.name} должен быть classmethod')
 
     # Проверка наличия total_usage в keyword-only аргументах: *, total_usage
-    kwonly = {arg.arg for arg in run_method.args.kwonlyargs}
+    has_total_usage = False
+    for arg in run_method.args.kwonlyargs:
+        if arg.arg == 'total_usage':
+            has_total_usage = True
+            break
 
-    if 'total_usage' not in kwonly:
+    if not has_total_usage:
         fail(
             f'{file}: метод run() в {class_node.name} '
             f'должен принимать total_usage как keyword-only (*, total_usage=...)'
@@ -117,51 +480,44 @@ def check_project_structure() -> None:
     - наличие README.md
     """
 
-    required_structure = {
-        'app': PROJECT_ROOT / 'app',
-        'app/outsource': PROJECT_ROOT / 'app' / 'outsource',
-        'app/outsource/flows': PROJECT_ROOT / 'app' / 'outsource' / 'flows',
-        'app/consts.py': PROJECT_ROOT / 'app' / 'consts.py',
-        'demonstration': PROJECT_ROOT / 'demonstration',
-        'demonstration/main.py': PROJECT_ROOT / 'demonstration' / 'main.py',
-        'eksmo_src': PROJECT_ROOT / 'eksmo_src',
-        '.pre-commit-config.yaml': PROJECT_ROOT / '.pre-commit-config.yaml',
-        'pyproject.toml': PROJECT_ROOT / 'pyproject.toml',
-        'README.md': PROJECT_ROOT / 'README.md',
-    }
-
-    for description, path in required_structure.items():
-        if (
-                description.endswith('.py')
-                or description.endswith('.yaml')
-                or description.endswith('.toml')
-                or description.endswith('.md')
-        ):
+    errors = []
+    for description, path, is_file in REQUIRED_STRUCTURE:
+        if is_file:
             # файлы
-            if not path.is_file():
-                fail(f'Отсутствует файл: {description} ({path})')
+            if not _is_file(path):
+                errors.append(f'Отсутствует файл: {description} ({path})')
         else:
             # папки
-            if not path.is_dir():
-                fail(f'Отсутствует директория: {description} ({path})')
+            if not _is_dir(path):
+                errors.append(f'Отсутствует директория: {description} ({path})')
+
+    if errors:
+        fail(*errors)
 
     print('✔ Структура проекта корректна')
 
 
 def check_demo_main() -> None:
-    """Проверяет demonstration/main.py:
-    - наличие async def main()
-    - main() не принимает аргументов
-    - main() вызывается (asyncio.run(main()))
-    """
+    """Проверяет demonstration/main.py (с учётом кэша результатов)."""
 
     main_path = PROJECT_ROOT / 'demonstration' / 'main.py'
 
-    if not main_path.is_file():
+    if not _is_file(main_path):
         fail(f'Не найден demonstration/main.py ({main_path})')
 
-    code = main_path.read_text()
-    tree = ast.parse(code)
+    cached(main_path, check_demo_main_file)
+
+    print('✔ demonstration/main.py корректен')
+
+
+def check_demo_main_file(main_path: Path, source: bytes) -> None:
+    """Проверяет содержимое demonstration/main.py:
+    - наличие async def main()
+    - main() не принимает аргументов
+    - main() вызывается (asyncio.run(main()))
+    """
+
+    tree = _parse(source, str(main_path))
 
     # --- Ищем функцию async main()
     main_func = None
@@ -189,7 +545,8 @@ def check_demo_main() -> None:
     # --- Проверяем вызов main() внизу
     calls_main = False
 
-    for node in tree.body[::-1]:
+    # Вызов обычно последний, поэтому идём с конца — без копии списка
+    for node in reversed(tree.body):
         # ищем выражения типа: main()  И/ИЛИ asyncio.run(main())
         if not isinstance(node, ast.Expr):
             continue
@@ -219,26 +576,55 @@ def check_demo_main() -> None:
     if not calls_main:
         fail(f'{main_path}: функция main() должна вызываться в конце файла (asyncio.run(main()))')
 
-    print('✔ demonstration/main.py корректен')
-
 
-def check_file_length(file: Path, max_lines: int = 1000) -> None:
+def check_file_length(file: Path, source: bytes, max_lines: int = 1000) -> None:
     """Проверяет, что файл не превышает ограничение по количеству строк."""
-    lines = file.read_text().splitlines()
-    if len(lines) > max_lines:
-        fail(f'{file}: слишком большой файл ({len(lines)} строк), лимит = {max_lines}')
+    # Считаем переводы строк прямо в байтах: без декодирования и списка строк
+    lines = source.count(b'\n')
+    if source and not source.endswith(b'\n'):
+        lines += 1  # последняя строка без перевода строки
+
+    if lines > max_lines:
+        fail(f'{file}: слишком большой файл ({lines} строк), лимит = {max_lines}')
 
 
 
-def check_all_python_files_length(max_lines: int = 1000) -> None:
-    """Проверяет, что ни один .py файл в проекте не превышает max_lines."""
-    for path in PROJECT_ROOT.rglob("*.py"):
-        # Скипаем файлы из виртуальных окружений или внешних директорий, если есть
-        if "venv" in path.parts or "env" in path.parts:
+def check_all_python_files_length(py_files: dict[Path, int], max_lines: int = 1000) -> None:
+    """Проверяет, что ни один .py файл в проекте не превышает max_lines.
+
+    Виртуальные окружения (EXCLUDED_DIRS) отсекаются ещё при обходе проекта;
+    внутри app/ обход их не отсекает, поэтому такие файлы пропускаются здесь.
+    """
+    errors = []
+    for path, size in py_files.items():
+        # В каждой строке, кроме последней, есть хотя бы '\n', поэтому файл
+        # не длиннее max_lines байт не может превысить лимит — не читаем его
+        if size <= max_lines:
             continue
-        check_file_length(path, max_lines)
+        if not EXCLUDED_DIRS.isdisjoint(path.relative_to(PROJECT_ROOT).parent.parts):
+            continue
+        try:
+            check_file_length(path, _read_bytes(str(path)), max_lines)
+        except CheckError as error:
+            errors.extend(error.args)
+
+    if errors:
+        fail(*errors)
 
 def check_readme() -> None:
+    """Проверяет README.md (с учётом кэша результатов)."""
+
+    readme_path = PROJECT_ROOT / "README.md"
+
+    if not readme_path.is_file():
+        fail(f"Отсутствует README.md ({readme_path})")
+
+    cached(readme_path, check_readme_file)
+
+    print("✔ README.md корректен")
+
+
+def check_readme_file(readme_path: Path, source: bytes) -> None:
     """Проверяет README.md на наличие обязательных секций.
 
     Требования:
@@ -248,12 +634,7 @@ def check_readme() -> None:
     - содержит секцию запуска/демонстрации
     """
 
-    readme_path = PROJECT_ROOT / "README.md"
-
-    if not readme_path.is_file():
-        fail(f"Отсутствует README.md ({readme_path})")
-
-    content = readme_path.read_text().strip()
+    content = source.decode().strip()
 
     if not content:
         fail("README.md пустой")
@@ -268,30 +649,16 @@ def check_readme() -> None:
     if not any(len(line.strip()) > 10 for line in first_lines if not line.startswith("#")):
         fail("README.md должен содержать описание проекта сразу после заголовка")
 
+    lowered = content.lower()
+
     # --- 3) Проверка наличия секции установки
-    install_keywords = [
-        "установка",
-        "installation",
-        "setup",
-        "инсталляция",
-        "install",
-    ]
-    if not any(keyword.lower() in content.lower() for keyword in install_keywords):
+    if not _README_INSTALL_RE.search(lowered):
         fail("README.md должен содержать секцию установки (например: \"Установка\", \"Installation\")")
 
     # --- 4) Проверка наличия секции запуска / демонстрации
-    run_keywords = [
-        "запуск",
-        "run",
-        "usage",
-        "использование",
-        "демонстрация",
-    ]
-    if not any(keyword.lower() in content.lower() for keyword in run_keywords):
+    if not _README_RUN_RE.search(lowered):
         fail("README.md должен содержать секцию запуска/демонстрации (например: \"Запуск\", \"Демонстрация\")")
 
-    print("✔ README.md корректен")
-
 def check_app_directory_contents() -> None:
     """Проверяет, что в app/ лежат только файлы consts.py, __init__.py и директория outsource/.
 
@@ -306,30 +673,55 @@ def check_app_directory_contents() -> None:
 
     app_dir = PROJECT_ROOT / "app"
 
-    if not app_dir.is_dir():
+    if not _is_dir(app_dir):
         fail(f"Отсутствует директория app/ ({app_dir})")
 
     allowed_files = {"consts.py", "__init__.py"}
     allowed_dirs = {"outsource"}
 
-    for item in app_dir.iterdir():
+    errors = []
+    for name, (is_dir, is_file) in sorted(_dir_entries(app_dir).items()):
 
         # --- Разрешённые директории
-        if item.is_dir():
-            if item.name not in allowed_dirs:
-                fail(f"Недопустимая директория в app/: {item.name} (разрешено только outsource/)")
+        if is_dir:
+            if name not in allowed_dirs:
+                errors.append(f"Недопустимая директория в app/: {name} (разрешено только outsource/)")
             continue
 
         # --- Разрешённые файлы
-        if item.is_file():
-            if item.name not in allowed_files:
-                fail(f"Недопустимый файл в app/: {item.name} (разрешено только consts.py и __init__.py)")
+        if is_file:
+            if name not in allowed_files:
+                errors.append(f"Недопустимый файл в app/: {name} (разрешено только consts.py и __init__.py)")
             continue
 
+    if errors:
+        fail(*errors)
+
     print("✔ Содержимое app/ корректно")
 
 
-def check_app_imports() -> None:
+# Поля, в которых у инструкций лежат вложенные блоки инструкций
+_NESTED_BLOCK_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def _iter_imports(statements: list[ast.stmt]) -> Iterator[ast.Import | ast.ImportFrom]:
+    """Возвращает все import/from-import в порядке следования в исходнике.
+
+    Импорт — всегда инструкция, поэтому обходятся только блоки инструкций
+    (if/try/with/def/class/...), без спуска в выражения, как в ast.walk().
+    """
+    stack = list(reversed(statements))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+            continue
+
+        for field in reversed(_NESTED_BLOCK_FIELDS):
+            stack.extend(reversed(getattr(node, field, ())))
+
+
+def check_app_imports(py_files: dict[Path, int]) -> None:
     """Проверяет, что внутри app/ не используются импорты локальных модулей вне app/,
     кроме разрешённого исключения eksmo_src.eksmo_types.
 
@@ -344,21 +736,27 @@ def check_app_imports() -> None:
 
     # Собираем локальные модули в корне проекта
     local_modules = set()
-    for item in PROJECT_ROOT.iterdir():
-        if item.name == "app":
+    for name, (is_dir, is_file) in _dir_entries(PROJECT_ROOT).items():
+        if name == "app":
             continue
-        if item.is_dir():
-            local_modules.add(item.name)
-        if item.is_file() and item.suffix == ".py":
-            local_modules.add(item.stem)
+        if is_dir:
+            local_modules.add(name)
+        if is_file and name.endswith(".py"):
+            local_modules.add(name[:-3])
 
     # Разрешённый импорт
     allowed_full_import = "eksmo_src.eksmo_types"
 
-    for py_file in app_dir.rglob("*.py"):
-        tree = ast.parse(py_file.read_text())
+    errors = []
+
+    for py_file, size in py_files.items():
+        # Пустые файлы (обычно __init__.py) не могут содержать импортов
+        if not size or app_dir not in py_file.parents:
+            continue
+
+        tree = _parse(_read_bytes(str(py_file)), str(py_file))
 
-        for node in ast.walk(tree):
+        for node in _iter_imports(tree.body):
 
             # --- import xxx.yyy
             if isinstance(node, ast.Import):
@@ -372,7 +770,7 @@ def check_app_imports() -> None:
 
                     # Если импорт из локального модуля, кроме app — запрещён
                     if top_module in local_modules and top_module != "app":
-                        fail(
+                        errors.append(
                             f"{py_file}: запрещён импорт локального модуля '{full_name}'. "
                             f"Модуль app должен быть самодостаточным."
                         )
@@ -394,25 +792,43 @@ def check_app_imports() -> None:
 
                 # Запрещён импорт из других локальных модулей
                 if top_module in local_modules and top_module != "app":
-                    fail(
+                    errors.append(
                         f"{py_file}: запрещён импорт локального модуля '{full_module}' через 'from'. "
                         f"Модуль app должен быть самодостаточным."
                     )
 
+    if errors:
+        fail(*errors)
+
     print("✔ Импорты в app/ корректны — нет неразрешённых локальных зависимостей")
 
 
 
 def main() -> None:
     print('🔍 Запуск предвалидатора…')
-    check_project_structure()
-    check_app_directory_contents()
-    check_app_imports()   # <--- новое правило
-    check_structure()
-    check_demo_main()
-    check_flow_run_signature()
-    check_readme()
-    check_all_python_files_length()
+    load_cache()
+    _errors.clear()
+    try:
+        py_files = dict(_collect_py_files())
+        checks = (
+            check_project_structure,
+            check_app_directory_contents,
+            functools.partial(check_app_imports, py_files),   # <--- новое правило
+            check_structure,
+            check_demo_main,
+            check_flow_run_signature,
+            check_readme,
+            functools.partial(check_all_python_files_length, py_files),
+        )
+        for check in checks:
+            with collect_errors():
+                check()
+    finally:
+        save_cache()
+
+    if _errors:
+        print('\n'.join(f'❌ {message}' for message in _errors))
+        sys.exit(1)
     print('🎉 Все проверки успешно пройдены!')
 
 